@@ -1,5 +1,10 @@
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator, List
+import requests
+from tqdm import tqdm
 from human_comparison.contest_processor import ContestInput
 from human_comparison.contest_aggregate import ContestAggregator
 from human_comparison.utils.toolbox import (
@@ -7,6 +12,12 @@ from human_comparison.utils.toolbox import (
     get_repo_name,
     get_md_files,
     download_report_md,
+    create_http_session,
+    read_report_md,
+    is_reports_archive,
+    read_reports_archive,
+    write_reports_archive,
+    REPORTS_CACHE_DIR,
 )
 
 
@@ -23,12 +34,17 @@ def get_contest_data_from_raw(raw_report: str, file_name: str) -> ContestInput:
     return contest_data
 
 
-def get_contest_data_from_url(url: str, github_api_key: str) -> ContestInput:
+def get_contest_data_from_url(
+    url: str,
+    github_api_key: str,
+    cache_dir: str | Path | None = None,
+    session: requests.Session | None = None,
+) -> ContestInput:
     """
     Get contest data from a URL.
     """
     repo_name = get_repo_name(url)
-    raw_report = download_report_md(url, github_api_key)
+    raw_report = download_report_md(url, github_api_key, cache_dir, session)
     contest_data = ContestInput(
         repo_name=repo_name,
         raw_report=raw_report,
@@ -45,44 +61,87 @@ def save_raw_report(raw_report: str, file_path: Path) -> None:
         f.write(raw_report)
 
 
+def download_contests(
+    urls: List[str],
+    github_api_key: str,
+    cache_dir: str | Path | None,
+    concurrency: int,
+) -> Iterator[ContestInput]:
+    """
+    Lazily download the contests in the given order.
+
+    Downloads are network bound, so they run on a pool of workers sharing one
+    connection pool. At most `concurrency` reports are in flight or waiting to be
+    consumed, which keeps the memory bounded regardless of the number of contests.
+    """
+    with (
+        create_http_session(concurrency) as session,
+        ThreadPoolExecutor(max_workers=concurrency) as executor,
+    ):
+        pending = deque()
+        for url in urls:
+            pending.append(
+                executor.submit(get_contest_data_from_url, url, github_api_key, cache_dir, session)
+            )
+            if len(pending) >= concurrency:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def load_contests_from_csv(args: argparse.Namespace) -> Iterator[ContestInput]:
+    """
+    Lazily load the contests listed in the CSV file, saving the raw reports if requested.
+    """
+    print(f"Loading contests from: {args.contests_csv_file}")
+    urls = contest_loader(args.contests_csv_file, column="findingsRepo")
+    cache_dir = None if args.no_cache else args.cache_dir
+    downloads = download_contests(urls, args.github_api_key, cache_dir, args.concurrency)
+    downloads = tqdm(downloads, total=len(urls), desc="Loading contests", unit="contest")
+    if args.save_raw_reports and is_reports_archive(args.save_raw_reports):
+        # Stream all the raw reports into a single archive
+        with write_reports_archive(args.save_raw_reports) as add_report:
+            for contest in downloads:
+                add_report(f"{contest.repo_name}.md", contest.raw_report)
+                yield contest
+        return
+    if args.save_raw_reports:
+        Path(args.save_raw_reports).mkdir(exist_ok=True)
+    for contest in downloads:
+        if args.save_raw_reports:
+            save_raw_report(
+                contest.raw_report,
+                Path(args.save_raw_reports) / f"{contest.repo_name}.md",
+            )
+        yield contest
+
+
+def load_contests_from_raw(path: str) -> Iterator[ContestInput]:
+    """
+    Lazily load the raw reports (md files) from a file, a directory or an archive.
+    """
+    print(f"Loading raw reports from: {path}")
+    if is_reports_archive(path):
+        for file_name, raw_report in read_reports_archive(path):
+            yield get_contest_data_from_raw(raw_report, file_name)
+        return
+    md_files_to_process = get_md_files(path)
+    for file in md_files_to_process:
+        yield get_contest_data_from_raw(read_report_md(file), file)
+
+
 def main(args: argparse.Namespace):
     """
     Main function to process the contest data.
     """
-    contest_data = []
+    # Contests are loaded lazily and processed one at a time, so that only the
+    # reports currently being processed are kept in memory
     if args.contests_csv_file:
         # Load contests from CSV file
-        print(f"Loading contests from: {args.contests_csv_file}")
-        contests = contest_loader(args.contests_csv_file)
-        count = 1
-        for contest in contests:
-            print(
-                f"\rLoading {contest['findingsRepo']} - {count}/{len(contests)}".ljust(100),
-                end="\r",
-            )
-            contest_data.append(
-                get_contest_data_from_url(contest["findingsRepo"], args.github_api_key)
-            )
-            if args.save_raw_reports:
-                Path(args.save_raw_reports).mkdir(exist_ok=True)
-                save_raw_report(
-                    contest_data[-1].raw_report,
-                    Path(args.save_raw_reports) / f"{contest_data[-1].repo_name}.md",
-                )
-            count += 1
-        if args.save_raw_reports:
-            print(f"Saved raw reports to: {args.save_raw_reports}.")
-            print(
-                f"You can now run the tool with the option --from-raw-path {args.save_raw_reports} instead of --contests_csv_file and --github-api-key."
-            )
+        contests = load_contests_from_csv(args)
     else:
         # Load raw reports from a directory
-        print(f"Loading raw reports from: {args.from_raw_path}")
-        md_files_to_process = get_md_files(args.from_raw_path)
-        for file in md_files_to_process:
-            with open(file, "r") as f:
-                raw_report = f.read()
-                contest_data.append(get_contest_data_from_raw(raw_report, file))
+        contests = load_contests_from_raw(args.from_raw_path)
 
     # Initialize the aggregator
     aggregator = ContestAggregator(
@@ -91,7 +150,13 @@ def main(args: argparse.Namespace):
     )
 
     # Process the contest data, aggregat and compute stats
-    aggregator.get_top_performer_stats(contest_data)
+    aggregator.get_top_performer_stats(contests)
+
+    if args.save_raw_reports:
+        print(f"Saved raw reports to: {args.save_raw_reports}.")
+        print(
+            f"You can now run the tool with the option --from-raw-path {args.save_raw_reports} instead of --contests_csv_file and --github-api-key."
+        )
 
 
 if __name__ == "__main__":
@@ -121,7 +186,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "-r",
         "--from-raw-path",
-        help="The path to the raw report to process.",
+        help="The path to the raw report to process: a md file, a directory or a .tar.zst archive.",
         default=None,
         action="store",
     )
@@ -133,9 +198,28 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "--save-raw-reports",
-        help="Whether to save the raw reports to the given directory.",
+        help="Whether to save the raw reports to the given directory, or to a single archive if the path ends with .tar.zst.",
         default=None,
     )
+    parser.add_argument(
+        "--concurrency",
+        help="The maximum number of reports to download in parallel.",
+        default=16,
+        type=int,
+        action="store",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="The directory where downloaded reports are cached along with their ETags.",
+        default=REPORTS_CACHE_DIR,
+        action="store",
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="Whether to always download the reports instead of revalidating the cached ones.",
+        default=False,
+        action="store_true",
+    )
     args = parser.parse_args()
 
     if not args.contests_csv_file and not args.from_raw_path:
@@ -150,4 +234,6 @@ if __name__ == "__main__":
         parser.error(
             "The save-raw-reports flag cannot be specified when using --from-raw-path (-r)"
         )
+    if args.concurrency < 1:
+        parser.error("The concurrency must be at least 1")
     main(args)
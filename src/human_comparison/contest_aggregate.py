@@ -1,99 +1,202 @@
-from typing import Dict, List, Callable, Any
+from typing import Dict, Iterable, Iterator, List, Callable, Any
+import numpy as np
 from loguru import logger as log
 from human_comparison.contest_processor import (
     ContestProcessor,
-    Warden,
     LocalWardenContainer,
     ContestInput,
+    ContestReport,
 )
 from human_comparison.utils.toolbox import set_logger
 
+# Stats stored for each warden, with the dtype of their array in GlobalWardenContainer
+WARDEN_STATS_DTYPES = {
+    "total_findings": np.int64,
+    "total_high": np.int64,
+    "total_medium": np.int64,
+    "total_issues": np.int64,
+    "contest_participations": np.int64,
+    "avg_findings_per_contest": np.float64,
+    "avg_findings_per_issues": np.float64,
+}
+
 
 class GlobalWardenStats:
-    name: str
-    total_findings: int
-    total_high: int
-    total_medium: int
-    total_issues: int
-    contest_participations: int
-    avg_findings_per_contest: float
-
-    def __init__(self, warden: Warden, report_issues: int):
-        self.name = warden.name
-        self.total_findings = warden.get_total_findings()
-        self.total_high = warden.findings_high
-        self.total_medium = warden.findings_medium
-        self.total_issues = report_issues
-        self.contest_participations = 1
-        self.avg_findings_per_contest = warden.get_total_findings()
-        self.avg_findings_per_issues = float(self.total_findings) / float(self.total_issues)
-
-    def update(self, warden: Warden, exclude_zero_score: bool, report_issues: int) -> None:
-        assert warden.name == self.name
-        if exclude_zero_score and warden.get_total_findings() == 0:
-            return
-        self.total_findings += warden.get_total_findings()
-        self.total_high += warden.findings_high
-        self.total_medium += warden.findings_medium
-        self.total_issues += report_issues
-        self.contest_participations += 1
-        self.avg_findings_per_contest = float(self.total_findings) / float(
-            self.contest_participations
-        )
-        self.avg_findings_per_issues = float(self.total_findings) / float(self.total_issues)
+    """Stats of one warden across all contests, as read from a GlobalWardenContainer"""
+
+    __slots__ = (
+        "name",
+        "total_findings",
+        "total_high",
+        "total_medium",
+        "total_issues",
+        "contest_participations",
+        "avg_findings_per_contest",
+        "avg_findings_per_issues",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        total_findings: int,
+        total_high: int,
+        total_medium: int,
+        total_issues: int,
+        contest_participations: int,
+        avg_findings_per_contest: float,
+        avg_findings_per_issues: float,
+    ):
+        self.name = name
+        self.total_findings = total_findings
+        self.total_high = total_high
+        self.total_medium = total_medium
+        self.total_issues = total_issues
+        self.contest_participations = contest_participations
+        self.avg_findings_per_contest = avg_findings_per_contest
+        self.avg_findings_per_issues = avg_findings_per_issues
 
     def __repr__(self) -> str:
         return f"GlobalWardenStats(name={self.name}, total_findings={self.total_findings}, total_high={self.total_high}, total_medium={self.total_medium}, contest_participations={self.contest_participations}, avg_findings_per_contest={self.avg_findings_per_contest})"
 
 
 class GlobalWardenContainer:
-    """Container for wardens in all contests"""
+    """Container for wardens in all contests
 
-    _wardens_stats: Dict[str, GlobalWardenStats]
+    The stats are stored as a structure of arrays: one NumPy array per stat, where
+    each warden owns the row given by _rows. The arrays grow geometrically as new
+    wardens are found, and each contest updates all its wardens with one vectorized
+    operation per stat. The averages are only computed by finalize(), once all the
+    contests have been added.
+    """
+
+    _rows: Dict[str, int]
+    _names: List[str]
+    _stats: Dict[str, np.ndarray]
+    _finalized: bool
     _exclude_zero_score: bool
 
-    def __init__(self, exclude_zero_score: bool):
-        self._wardens_stats = {}
+    def __init__(self, exclude_zero_score: bool, capacity: int = 1024):
+        self._rows = {}
+        self._names = []
+        self._stats = {
+            stat: np.zeros(capacity, dtype=dtype) for stat, dtype in WARDEN_STATS_DTYPES.items()
+        }
+        self._finalized = True
         self._exclude_zero_score = exclude_zero_score
 
+    def _add_warden(self, warden_name: str) -> int:
+        row = len(self._names)
+        capacity = len(self._stats["total_findings"])
+        if row == capacity:
+            for stat, values in self._stats.items():
+                self._stats[stat] = np.zeros(2 * capacity, dtype=values.dtype)
+                self._stats[stat][:capacity] = values
+        self._rows[warden_name] = row
+        self._names.append(warden_name)
+        return row
+
+    def _get_stats(self, row: int) -> GlobalWardenStats:
+        self.finalize()
+        return GlobalWardenStats(
+            name=self._names[row],
+            **{stat: values[row].item() for stat, values in self._stats.items()},
+        )
+
+    def get_num_wardens(self) -> int:
+        return len(self._names)
+
     def get_all_wardens(self) -> List[GlobalWardenStats]:
-        return list(self._wardens_stats.values())
+        return [self._get_stats(row) for row in range(len(self._names))]
 
     def get_warden(self, warden_name: str) -> GlobalWardenStats:
-        if warden_name not in self._wardens_stats:
+        if warden_name not in self._rows:
             raise ValueError(f"Warden {warden_name} not found")
-        return self._wardens_stats[warden_name]
+        return self._get_stats(self._rows[warden_name])
+
+    def get_top_wardens(self, stat: str, num_wardens: int) -> List[GlobalWardenStats]:
+        """Get the num_wardens wardens with the highest stat, in descending order.
+
+        Ties keep the order in which the wardens were first found. Instead of sorting all
+        the wardens, the cutoff value is found with a partial partition in O(n) and only
+        the selected wardens are sorted.
+        """
+        self.finalize()
+        values = self._stats[stat][: len(self._names)]
+        if num_wardens < len(values):
+            cutoff = np.partition(values, len(values) - num_wardens)[len(values) - num_wardens]
+            above = np.flatnonzero(values > cutoff)
+            # Same as a stable sort: the first found wardens win the ties on the cutoff
+            ties = np.flatnonzero(values == cutoff)[: num_wardens - len(above)]
+            rows = np.concatenate((above, ties))
+        else:
+            rows = np.arange(len(values))
+        # Sort by descending value, then by ascending row
+        top_rows = rows[np.lexsort((rows, -values[rows]))]
+        return [self._get_stats(row) for row in top_rows.tolist()]
 
     def update_warden_stats(self, wardens: LocalWardenContainer, report_issues: int) -> None:
+        rows, findings, findings_high, findings_medium = [], [], [], []
         for warden in wardens.get_wardens().values():
-            if warden.name not in self._wardens_stats:
-                self._wardens_stats[warden.name] = GlobalWardenStats(warden, report_issues)
-            else:
-                self._wardens_stats[warden.name].update(
-                    warden, self._exclude_zero_score, report_issues
-                )
+            total_findings = warden.get_total_findings()
+            row = self._rows.get(warden.name)
+            if row is None:
+                row = self._add_warden(warden.name)
+            elif self._exclude_zero_score and total_findings == 0:
+                continue
+            rows.append(row)
+            findings.append(total_findings)
+            findings_high.append(warden.findings_high)
+            findings_medium.append(warden.findings_medium)
+        if not rows:
+            return
+
+        # Warden names are unique in a contest, so the rows can be updated in place
+        rows = np.array(rows, dtype=np.intp)
+        stats = self._stats
+        stats["total_findings"][rows] += findings
+        stats["total_high"][rows] += findings_high
+        stats["total_medium"][rows] += findings_medium
+        stats["total_issues"][rows] += report_issues
+        stats["contest_participations"][rows] += 1
+        self._finalized = False
+
+    def finalize(self) -> None:
+        """Compute the average stats of all the wardens in one vectorized pass."""
+        if self._finalized:
+            return
+        num_wardens = len(self._names)
+        stats = {stat: values[:num_wardens] for stat, values in self._stats.items()}
+        np.divide(
+            stats["total_findings"],
+            stats["contest_participations"],
+            out=stats["avg_findings_per_contest"],
+        )
+        np.divide(
+            stats["total_findings"], stats["total_issues"], out=stats["avg_findings_per_issues"]
+        )
+        self._finalized = True
 
     def sort_wardens(
         self,
         sort_by: Callable[[GlobalWardenStats], Any] = lambda x: x.avg_findings_per_contest,
         reverse=True,
     ) -> List[GlobalWardenStats]:
-        sorted_wardens = sorted(self._wardens_stats.values(), key=sort_by, reverse=reverse)
+        sorted_wardens = sorted(self.get_all_wardens(), key=sort_by, reverse=reverse)
         return sorted_wardens
 
     def _get_warden_stats_str(self, sort_by: Callable[[GlobalWardenStats], Any]) -> str:
+        # Sort once, filtering preserves the order of the sorted wardens
+        sorted_wardens = self.sort_wardens(sort_by, reverse=True)
         # Filter wardens with total findings > 0
-        hm_wardens = [stats for stats in self._wardens_stats.values() if stats.total_findings > 0]
-        sorted_hm_wardens = sorted(hm_wardens, key=sort_by, reverse=True)
-        stats_str = f"\n  Total H/M wardens: {len(hm_wardens)}\n"
+        sorted_hm_wardens = [stats for stats in sorted_wardens if stats.total_findings > 0]
+        stats_str = f"\n  Total H/M wardens: {len(sorted_hm_wardens)}\n"
         stats_str += "\n".join([f"  - {warden.name}: {warden}" for warden in sorted_hm_wardens])
         if self._exclude_zero_score:
             # Filter wardens with total findings = 0
-            no_findings_wardens = [
-                stats for stats in self._wardens_stats.values() if stats.total_findings == 0
+            sorted_no_findings_wardens = [
+                stats for stats in sorted_wardens if stats.total_findings == 0
             ]
-            sorted_no_findings_wardens = sorted(no_findings_wardens, key=sort_by, reverse=True)
-            stats_str += f"\n  Total wardens with no findings: {len(no_findings_wardens)}\n"
+            stats_str += f"\n  Total wardens with no findings: {len(sorted_no_findings_wardens)}\n"
             stats_str += "\n".join(
                 [f"  - {warden.name}: {warden}" for warden in sorted_no_findings_wardens]
             )
@@ -113,66 +216,75 @@ class ContestAggregator:
         debug: bool = False,
     ):
         self._exclude_zero_score = exclude_zero_score
-        self._top_percentile = top_percentile
         if top_percentile < 0.0 or top_percentile > 0.99:
             raise ValueError("top_percentile must be between 0.0 and 0.99")
+        self._top_percentile = top_percentile
+        # Fraction of top wardens to compute the stats for, and its label
+        self._top_limit = 1.0 - top_percentile
+        self._top_limit_label = f"{self._top_limit * 100:.1f}%"
         self._verbose = verbose or debug
         self._debug = debug
         self._global_wardens = GlobalWardenContainer(exclude_zero_score=exclude_zero_score)
         set_logger()
 
-    def get_warden(self, warden_name: str) -> Warden:
+    def get_warden(self, warden_name: str) -> GlobalWardenStats:
         return self._global_wardens.get_warden(warden_name)
 
-    def process_contests(self, contests: List[ContestInput]) -> None:
+    def _get_contest_processor(self) -> ContestProcessor:
+        return ContestProcessor(
+            exclude_zero_score=self._exclude_zero_score,
+            verbose=self._verbose,
+            debug=self._debug,
+        )
+
+    def _process_reports(self, contests: Iterable[ContestInput]) -> Iterator[ContestReport]:
+        """Process the contests in order and yield their reports.
+
+        The contests may be a lazy iterator, whose downloads keep running in the
+        background while each report is parsed here.
+        """
+        # The processor resets its state for each contest, so it is reused for all of them
+        contest_processor = self._get_contest_processor()
         for contest in contests:
-            contest_processor = ContestProcessor(
-                exclude_zero_score=self._exclude_zero_score,
-                verbose=self._verbose,
-                debug=self._debug,
-            )
-            set_logger(contest.repo_name)
-            report = contest_processor.process_contest(contest)
-            if report is None:
-                continue
-            self._global_wardens.update_warden_stats(report.wardens)
-            log.debug(report)
+            with log.contextualize(repo_name=contest.repo_name):
+                report = contest_processor.process_contest(contest)
+            if report is not None:
+                yield report
+
+    def process_contests(self, contests: Iterable[ContestInput]) -> None:
+        for report in self._process_reports(contests):
+            self._global_wardens.update_warden_stats(report.wardens, len(report.issues))
+            # Only format the report and the wardens when a sink consumes debug records
+            log.opt(lazy=True).debug("{}", lambda: repr(report))
             log.debug("********" * 10)
 
-        set_logger()
-        log.debug(self._global_wardens)
+        log.opt(lazy=True).debug("{}", lambda: repr(self._global_wardens))
 
-    def get_top_performer_stats(self, contests: List[ContestInput]) -> None:
-        for contest in contests:
-            set_logger(contest.repo_name)
-            contest_processor = ContestProcessor(
-                exclude_zero_score=self._exclude_zero_score,
-                verbose=self._verbose,
-                debug=self._debug,
-            )
-            report = contest_processor.process_contest(contest)
-            if report is None:
-                continue
+    def get_top_performer_stats(self, contests: Iterable[ContestInput]) -> None:
+        # Contests may be a lazy iterator, only keep the per-warden stats of each report
+        for report in self._process_reports(contests):
             self._global_wardens.update_warden_stats(report.wardens, len(report.issues))
 
-        set_logger()
+        # Compute the averages once all the contests have been processed
+        self._global_wardens.finalize()
 
         total_ratio = 0.0
-        num_wardens = float(len(self._global_wardens.get_all_wardens()))
+        num_wardens = float(self._global_wardens.get_num_wardens())
         log.info(f"Total number of wardens on all contests: {num_wardens}")
-        # Sort wardens by average findings per issues
-        sorted_wardens = self._global_wardens.sort_wardens(lambda x: x.avg_findings_per_issues)
         # Get top 90% of wardens sorted by avg findings per issues
-        top_limit = 1.0 - self._top_percentile
-        num_top_wardens = max(1, int(num_wardens * top_limit))  # At least 1 warden
-        top_wardens = sorted_wardens[:num_top_wardens]  # Get first N since sorted ascending
-
-        log.info(f"Number of top wardens in top {top_limit * 100:.1f}%: {num_top_wardens}")
-        # Get max lengths for alignment
-        max_name_len = max(len(w.name) for w in top_wardens)
-        max_findings_len = max(len(str(w.total_findings)) for w in top_wardens)
-        max_issues_len = max(len(str(w.total_issues)) for w in top_wardens)
-        max_contests_len = max(len(str(w.contest_participations)) for w in top_wardens)
+        num_top_wardens = max(1, int(num_wardens * self._top_limit))  # At least 1 warden
+        top_wardens = self._global_wardens.get_top_wardens(
+            "avg_findings_per_issues", num_top_wardens
+        )
+
+        log.info(f"Number of top wardens in top {self._top_limit_label}: {num_top_wardens}")
+        # Get max lengths for alignment, in a single pass over the top wardens
+        max_name_len = max_findings_len = max_issues_len = max_contests_len = 0
+        for w in top_wardens:
+            max_name_len = max(max_name_len, len(w.name))
+            max_findings_len = max(max_findings_len, len(str(w.total_findings)))
+            max_issues_len = max(max_issues_len, len(str(w.total_issues)))
+            max_contests_len = max(max_contests_len, len(str(w.contest_participations)))
         if num_wardens > 0:
             for warden_stats in top_wardens:
                 if warden_stats.total_findings == 0:
@@ -1,43 +1,73 @@
 import re
+import sys
 from typing import Dict, List, Tuple, Callable, Any
 from dataclasses import dataclass
 from loguru import logger as log
 from human_comparison.utils.known_replacements import KnownReplacements
 from human_comparison.utils.mdprocessor import MdProcessor
 
-# Regex to extract issue title, severity and id from the issue title
-issue_title_regex = re.compile(r"## \[\[(H|M)-(\d+)\] ((?:\[[^\]]*\]|[^\]])*)\]\(https?://[^\)]+\)")
+# Regex to extract issue title, severity and id from the issue title, with or without hyperlink
+issue_title_regex = re.compile(
+    r"## \[(?:\[(H|M)-(\d+)\] ((?:\[[^\]]*\]|[^\]])*)\]\(https?://[^\)]+\)|(H|M)-(\d+)\] (.*))"
+)
 
-# Regex to extract issue title, severity and id from the issue title without hyperlink
-issue_title_regex_nohyperlink = re.compile(r"## \[(H|M)-(\d+)\] (.*)")
+# Regex to extract the warden name of a line of the numbered wardens list, the name is either
+# the text of a hyperlink or the start of the line, without the comment in parentheses
+warden_line_regex = re.compile(r"^(\d+)\. (?:\[([^[\]\n(]*)(\()?|([^\n(]*))", re.MULTILINE)
+
+# Regex to find the "Submitted by" line and capture the names
+submitted_by_regex = re.compile(r"^[*_]Submitted by (.*)$", re.MULTILINE)
+
+# Regex to match the innermost comments/hyperlinks of the "Submitted by" line
+submitter_comment_regex = re.compile(r"\([^()]*\)")
+
+# Regex to split the "Submitted by" line on the commas between names
+submitter_split_regex = re.compile(r"\s*,\s*")
+
+# Regex to match the escaped underscores, "\&#95;" included as it is unescaped twice
+special_chars_regex = re.compile(r"\\?&#95;|\\_|&lowbar;")
+
+# Regex to match the formatting characters ending the "Submitted by" line
+final_chars_regex = re.compile(r"(?:\*\.|\.\*|\*|_)\n\Z")
 
 
 # Sanitize special characters in the "Submitted by" line
 def replace_special_chars(text: str) -> str:
-    return text.replace("&#95;", "_").replace("\\_", "_").replace("&lowbar;", "_")
+    return special_chars_regex.sub("_", text)
 
 
 # Sanitize final characters in the "Submitted by" line
 def replace_final_chars(text: str) -> str:
-    if text.endswith("*.\n"):
-        return text[:-3] + "\n"
-    elif text.endswith(".*\n"):
-        return text[:-3] + "\n"
-    elif text.endswith("*\n"):
-        return text[:-2] + "\n"
-    elif text.endswith("_\n"):
-        return text[:-2] + "\n"
-    return text
-
-
-@dataclass
+    return final_chars_regex.sub("\n", text, count=1)
+
+
+# Split the cleaned "Submitted by" line into the submitter names, fixing the known typos
+def parse_submitters(line: str, typos: Dict[str, str]) -> List[str]:
+    # Remove the comments/hyperlinks, innermost first to handle the nested ones
+    count = 1
+    while count:
+        line, count = submitter_comment_regex.subn("", line)
+    # Only closing parentheses preceding any opening one can be left
+    if ")" in line:
+        log.error("Unmatched closing parenthesis")
+        exit(1)
+    # An unclosed comment runs until the end of the line
+    line = line.split("(", 1)[0]
+    # Keep the text of the hyperlinks
+    line = line.replace("[", "").replace("]", "")
+
+    names = [typos.get(name, name) for name in submitter_split_regex.split(line.strip()) if name]
+    return names
+
+
+@dataclass(slots=True)
 class ContestInput:
     repo_name: str
     contest_url: str
     raw_report: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Issue:
     title: str
     severity: str
@@ -47,13 +77,18 @@ class Issue:
     repo_name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Warden:
     name: str
     findings: List[Issue]
     findings_high: int
     findings_medium: int
 
+    def __post_init__(self):
+        # The same names come back in every contest, interning them makes the lookups
+        # in the warden containers compare the keys by identity
+        self.name = sys.intern(self.name)
+
     def get_name(self) -> str:
         return self.name
 
@@ -65,13 +100,20 @@ class Warden:
         return f"Warden(name={self.get_name()}, N findsings={self.get_total_findings()}, findings_high={self.findings_high}, findings_medium={self.findings_medium})"
 
 
+# Default key to sort the (name, warden) items of a contest by total findings
+def warden_findings_key(item: Tuple[str, Warden]) -> int:
+    return item[1].findings_high + item[1].findings_medium
+
+
 class LocalWardenContainer:
     """Container for wardens in one contest"""
 
     _wardens: Dict[str, Warden]
+    _total_findings: int
 
     def __init__(self):
         self._wardens = {}
+        self._total_findings = 0
 
     def get_wardens(self) -> List[Warden]:
         return self._wardens
@@ -82,26 +124,30 @@ class LocalWardenContainer:
     def set_warden(self, warden_name: str, warden: Warden) -> None:
         self._wardens[warden_name] = warden
 
+    def add_finding(self, warden: Warden, issue: Issue) -> None:
+        warden.findings.append(issue)
+        self._total_findings += 1
+
     def get_total_findings(self) -> int:
-        return sum(warden.get_total_findings() for warden in self._wardens)
+        return self._total_findings
 
     def get_warden_findings(self, warden_name: str) -> int:
         return self.get_warden(warden_name).get_total_findings()
 
     def sort_wardens(
-        self, sort_by: Callable[[Warden], Any] = lambda x: x[1].get_total_findings()
-    ) -> Dict[str, Warden]:
+        self, sort_by: Callable[[Tuple[str, Warden]], Any] = warden_findings_key
+    ) -> List[Tuple[str, Warden]]:
         return sorted(self._wardens.items(), key=sort_by, reverse=True)
 
     def prune_wardens(self) -> None:
-        self._wardens = [w for w in self._wardens if w.get_total_findings() > 0]
+        self._wardens = {name: warden for name, warden in self._wardens.items() if warden.findings}
 
     def __repr__(self) -> str:
         wardens_str = " ".join([warden_name for warden_name, _ in self._wardens.items()])
         return f"LocalWardenContainer(\n{wardens_str}\n)"
 
 
-@dataclass
+@dataclass(slots=True)
 class ContestReport:
     repo_name: str
     repo_url: str
@@ -126,7 +172,7 @@ class ContestProcessor:
         self._debug = debug
         self._wardens = LocalWardenContainer()
         self._issues = []
-        self._bots = []
+        self._bots = frozenset()
         self._typos = {}
         self._repo_name = None
         self._raw_report = None
@@ -136,28 +182,34 @@ class ContestProcessor:
         if not self._debug:
             return
 
+        # Only format the per warden and per issue lines when a sink consumes debug records
+        wardens = self._wardens.get_wardens().values()
         log.debug("********" * 10)
-        findings_count = sum(1 for warden in self._wardens.get_wardens() if warden.findings)
+        findings_count = sum(1 for warden in wardens if warden.findings)
         log.debug(f"Wardens that found High or Medium severity issues ({findings_count})")
-        for warden in self._wardens.get_wardens():
+        for warden in wardens:
             if warden.findings:
                 log.debug(warden.name)
                 for issue in warden.findings:
-                    log.debug(f" - {issue.uid}-[{issue.severity}-{issue.id}]: {issue.title}")
+                    log.opt(lazy=True).debug(
+                        "{}", lambda: f" - {issue.uid}-[{issue.severity}-{issue.id}]: {issue.title}"
+                    )
 
         log.debug("********" * 10)
-        no_findings_count = sum(1 for warden in self._wardens.get_wardens() if not warden.findings)
+        no_findings_count = sum(1 for warden in wardens if not warden.findings)
         log.debug(f"Wardens that did not find High or Medium severity issues ({no_findings_count})")
-        for warden in self._wardens.get_wardens():
+        for warden in wardens:
             if not warden.findings:
                 log.debug(warden.name)
 
         log.debug("********" * 10)
         log.debug(f"Issues found ({len(self._issues)}) per warden")
         for issue in self._issues:
-            log.debug(f"Issue {issue.uid}-[{issue.severity}-{issue.id}]: {issue.title}")
+            log.opt(lazy=True).debug(
+                "{}", lambda: f"Issue {issue.uid}-[{issue.severity}-{issue.id}]: {issue.title}"
+            )
             for warden in issue.found_by.values():
-                log.debug(f"  - {warden.name}")
+                log.opt(lazy=True).debug("{}", lambda: f"  - {warden.name}")
 
     def _set_known_replacements(self):
         self._bots = KnownReplacements.get_bots(self._repo_name)
@@ -172,20 +224,18 @@ class ContestProcessor:
         Returns:
             tuple[str, int, str]: Tuple containing (severity, id number, title)
         """
-        if not text.startswith("## [") and not text.startswith("# "):
+        if not text.startswith(("## [", "# ")):
             log.debug(f"Input '{text[:10]}...' is not an issue title, skipping")
             return None
         match = issue_title_regex.search(text)
-        if not match:
-            log.debug("No issue title with hyperlink found, retrying without hyperlink")
-            match = issue_title_regex_nohyperlink.search(text)
         if not match:
             log.warning("Failed to extract issue info, skipping")
             return None
 
-        severity = match.group(1)  # H or M
-        id_num = int(match.group(2))  # Convert "02" to 2
-        title = match.group(3)
+        # The last three groups are set when the title has no hyperlink
+        severity = match.group(1) or match.group(4)  # H or M
+        id_num = int(match.group(2) or match.group(5))  # Convert "02" to 2
+        title = match.group(3) if match.group(1) else match.group(6)
 
         return severity, id_num, title
 
@@ -207,20 +257,12 @@ class ContestProcessor:
         - Multiple names separated by commas
         - Known typos that need to be corrected
         """
-        line = None
-        # Parse the text to find the "submitted by" line
-        for line in text.split("\n"):
-            # print(f"Line: {line}")
-            if line.startswith("*Submitted by "):
-                line = line.replace("*Submitted by ", "")
-                break
-            elif line.startswith("_Submitted by "):
-                line = line.replace("_Submitted by ", "")
-                break
-        if line is None:
-            log.error("No submitted by line found")
-            exit(1)
-        line = line + "\n"
+        # Find the "submitted by" line without splitting the whole text
+        match = submitted_by_regex.search(text)
+        if match is None:
+            log.warning("No submitted by line found")
+            return []
+        line = match.group(1) + "\n"
         log.debug(f"Raw Line: {line}")
 
         # Clean up the line to make parsing easier (though inefficient)
@@ -234,41 +276,7 @@ class ContestProcessor:
 
         log.debug(f"Cleaned Line: {line}")
 
-        comment_queue = []  # Stack to track nested comments/hyperlinks
-        name_buffer = []  # Buffer to accumulate characters for a name
-        names = []  # Final list of names
-
-        # Parse the line to extract names, char by char
-        for char in line:
-            if char == "(":
-                comment_queue.append(char)
-                continue
-            elif char == ")":
-                if comment_queue and comment_queue[-1] == "(":
-                    comment_queue.pop()
-                else:
-                    log.error("Unmatched closing parenthesis")
-                    exit(1)
-                continue
-            elif char == "[":
-                continue
-            elif char == "]":
-                continue
-            elif char == "," and not comment_queue:
-                # Only split on commas outside of comments/hyperlinks
-                if name_buffer:
-                    name = "".join(name_buffer).strip()
-                    if name in self._typos.keys():
-                        name = self._typos[name]
-                    names.append(name)
-                    name_buffer = []
-            elif not comment_queue:
-                # Only collect characters when not in comments/hyperlinks
-                name_buffer.append(char)
-
-        # Add final name if buffer not empty
-        if name_buffer:
-            names.append("".join(name_buffer).strip())
+        names = parse_submitters(line, self._typos)
 
         log.debug(f"Names: {names}")
         return names
@@ -286,39 +294,36 @@ class ContestProcessor:
                 md_wardens = md
                 break
         line_counter = 1
-        for line in md_wardens.page_content.split("\n"):
-            if line.startswith("1. ") or line.startswith(f"{line_counter}. "):
-                no_index = (
-                    line.split("1. ")[1]
-                    if line.startswith("1. ")
-                    else line.split(f"{line_counter}. ")[1]
-                )
-                warden_name = None
-                if no_index.startswith("["):
-                    warden_name = no_index.split("[")[1].split("]")[0]
-                else:
-                    warden_name = no_index.strip()
-                if "(" in warden_name:
-                    warden_name = warden_name.split("(")[0].strip()
-                warden_name = replace_special_chars(warden_name)
-
-                self._wardens.set_warden(
-                    warden_name,
-                    Warden(
-                        name=warden_name,
-                        findings=[],
-                        findings_high=0,
-                        findings_medium=0,
-                    ),
-                )
+        for match in warden_line_regex.finditer(md_wardens.page_content):
+            # The list is numbered sequentially, or with "1." on every line
+            index = match.group(1)
+            if index != "1" and index != str(line_counter):
+                continue
+            if match.group(2) is not None:
+                warden_name = match.group(2)
+                # Names followed by a comment are stripped, like the other ones
+                if match.group(3):
+                    warden_name = warden_name.strip()
+            else:
+                warden_name = match.group(4).strip()
+            warden_name = replace_special_chars(warden_name)
+
+            warden = Warden(
+                name=warden_name,
+                findings=[],
+                findings_high=0,
+                findings_medium=0,
+            )
+            # Keyed by the interned name of the warden
+            self._wardens.set_warden(warden.name, warden)
 
-                line_counter += 1
+            line_counter += 1
 
-        for bot in self._bots:
-            self._wardens.set_warden(
-                f"bot-{bot}",
-                Warden(name=f"bot-{bot}", findings=[], findings_high=0, findings_medium=0),
-            )
+        # Sorted as the set order changes with the hash seed, and the order of the wardens
+        # breaks the ties of the stats
+        for bot in sorted(self._bots):
+            warden = Warden(name=f"bot-{bot}", findings=[], findings_high=0, findings_medium=0)
+            self._wardens.set_warden(warden.name, warden)
 
         if self._debug:
             log.debug(f"All wardens ({len(self._wardens.get_wardens())} total)")
@@ -331,54 +336,67 @@ class ContestProcessor:
 
     def _extract_issues(self, md_data: str) -> List[Issue]:
         """Extract list of issues from report text."""
-        # Filter the previous result to keep only high and medium risk issues
-        issues_md = MdProcessor.filter_topic(md_data)
-
-        # Categorize based on their index and drop the markdown language
-        categorized_md = [MdProcessor.split(i, [("###", "Details")], True) for i in issues_md]
+        # Bind the containers used in the loops to locals, to skip the attribute lookups
+        wardens_map = self._wardens.get_wardens()
+        add_finding = self._wardens.add_finding
+        issues_append = self._issues.append
+        bots = self._bots
+
+        # Process each issue to get the number of submitters and organize the data, in a single
+        # pass over the markdown segments
+        uid = 1
+        issues_count = 0
+        for md in md_data:
+            # Keep only high and medium risk issues
+            if not MdProcessor.is_risk_topic(md.metadata):
+                continue
+            issues_count += 1
 
-        # Filter the results to keep only the description, the impact and the proof of concept
-        issues_filtered = [MdProcessor.filter_issue(i) for i in categorized_md]
+            # Categorize based on their index and drop the markdown language
+            categorized_md = MdProcessor.split(md.page_content, (("###", "Details"),), True)
 
-        log.debug(f"Found {len(issues_filtered)} high and medium severity issues")
+            # Keep only the description, the impact and the proof of concept
+            issue = MdProcessor.filter_issue(categorized_md)
 
-        # Process each issue to get the number of submitters and organize the data
-        uid = 1
-        for issue in issues_filtered:
-            submitters = self._extract_submitted_by(issue[0])
             issue_info = self._extract_issue_info(issue[0])
-            found_by = {}
-            issue_data = None
-            if issue_info:
-                severity, id, title = issue_info
-                log.debug(f"Issue {uid}-[{severity}-{id}] ({len(submitters)}): {title}")
-                issue_data = Issue(
-                    title=title,
-                    severity=severity,
-                    id=id,
-                    uid=uid,
-                    found_by=found_by,
-                    repo_name=self._repo_name,
-                )
-            else:
+            if not issue_info:
                 log.trace("No issue info found")
                 continue
+            # Only look for the submitters of the sections that are issues
+            submitters = self._extract_submitted_by(issue[0])
+            found_by = {}
+            severity, id, title = issue_info
+            log.debug(f"Issue {uid}-[{severity}-{id}] ({len(submitters)}): {title}")
+            issue_data = Issue(
+                title=title,
+                severity=severity,
+                id=id,
+                uid=uid,
+                found_by=found_by,
+                repo_name=self._repo_name,
+            )
+            issue_wardens = []
             for submitter in submitters:
-                if submitter in self._bots:
+                if submitter in bots:
                     submitter = f"bot-{submitter}"
-                try:
-                    warden = self._wardens.get_warden(submitter)
-                except KeyError:
-                    log.trace(f"Warden {submitter} is a bot, skipping")
+                warden = wardens_map.get(submitter)
+                if warden is None:
+                    log.trace(f"Submitter {submitter} is not in the wardens list, skipping")
                     continue
-                issue_data.found_by[submitter] = warden
-                warden.findings.append(issue_data)
-                if severity == "H":
+                found_by[submitter] = warden
+                add_finding(warden, issue_data)
+                issue_wardens.append(warden)
+            # The severity is the same for all the submitters, branch once per issue
+            if severity == "H":
+                for warden in issue_wardens:
                     warden.findings_high += 1
-                else:
+            else:
+                for warden in issue_wardens:
                     warden.findings_medium += 1
-            self._issues.append(issue_data)
+            issues_append(issue_data)
             uid += 1
+
+        log.debug(f"Found {issues_count} high and medium severity issues")
         return self._issues
 
     def _extract_top_stats(self) -> Tuple[int, int, LocalWardenContainer]:
@@ -426,6 +444,10 @@ class ContestProcessor:
         Returns:
             ContestReport: Report containing contest details, wardens and issues
         """
+        # Reset the state of the previous contest, the previous report keeps its own
+        # wardens and issues containers
+        self._wardens = LocalWardenContainer()
+        self._issues = []
         self._repo_name = contest.repo_name
         self._raw_report = contest.raw_report
         self._contest_url = contest.contest_url
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, FrozenSet, List
 
 
 class KnownReplacements:
@@ -15,10 +15,15 @@ class KnownReplacements:
         "2023-08-dopex": ["IllIllI"],
     }
 
+    # Bots frozen once at import, so that the lookups share the same sets
+    _frozen_bots: Dict[str, FrozenSet[str]] = {
+        repo_name: frozenset(bots) for repo_name, bots in known_bots.items()
+    }
+
     @classmethod
     def get_typos(cls, repo_name: str) -> Dict[str, str]:
         return cls.known_typos.get(repo_name, {})
 
     @classmethod
-    def get_bots(cls, repo_name: str) -> List[str]:
-        return cls.known_bots.get(repo_name, [])
+    def get_bots(cls, repo_name: str) -> FrozenSet[str]:
+        return cls._frozen_bots.get(repo_name, frozenset())
@@ -1,5 +1,9 @@
+from typing import Dict, Sequence, Tuple
 from langchain_text_splitters import MarkdownHeaderTextSplitter
 
+# Prefixes of the topics holding the high and medium risk issues, e.g. "High Risk Findings (3)"
+RISK_TOPICS = ("High Risk Findings", "Medium Risk Findings")
+
 
 class MdProcessor:
     """
@@ -18,28 +22,28 @@ class MdProcessor:
     typically used in Code4rena contest reports.
 
     Methods:
+        is_risk_topic(metadata: dict) -> bool:
+            Checks if the metadata of a Markdown segment is a "Risk Findings" topic.
+
         filter_topic(md_data: list) -> list:
             Filters the input Markdown data to include only "Risk Findings" topics.
 
         filter_issue(md_data: list) -> list:
             Extracts the description and impact from a given Markdown data segment.
 
-        split(markdown_text: list, headers: list, strip_headers: bool) -> list:
+        split(markdown_text: list, headers: Sequence, strip_headers: bool) -> list:
             Splits the Markdown text into segments based on specified headers.
 
     """
 
+    @staticmethod
+    def is_risk_topic(metadata: dict) -> bool:
+        topic = metadata.get("Topic")
+        return topic is not None and topic.startswith(RISK_TOPICS)
+
     @staticmethod
     def filter_topic(md_data: list) -> list:
-        filtered = [
-            i.page_content
-            for i in md_data
-            if "Topic" in i.metadata
-            and (
-                "High Risk Findings" in i.metadata["Topic"]
-                or "Medium Risk Findings" in i.metadata["Topic"]
-            )
-        ]
+        filtered = [i.page_content for i in md_data if MdProcessor.is_risk_topic(i.metadata)]
         return filtered
 
     @staticmethod
@@ -57,14 +61,21 @@ class MdProcessor:
                 poc = i.page_content
         return [description, impact, poc]
 
+    # Splitters by headers and strip_headers, they keep no state between the calls
+    _splitters: Dict[Tuple[Tuple[Tuple[str, str], ...], bool], MarkdownHeaderTextSplitter] = {}
+
     @staticmethod
     def split(
         markdown_text: list,
-        headers: list = [("#", "Topic"), ("##", "Item")],
+        headers: Sequence[Tuple[str, str]] = (("#", "Topic"), ("##", "Item")),
         strip_headers: bool = False,
     ) -> list:
-        md_splitter = MarkdownHeaderTextSplitter(
-            headers_to_split_on=headers, strip_headers=strip_headers
-        )
+        key = (tuple(headers), strip_headers)
+        md_splitter = MdProcessor._splitters.get(key)
+        if md_splitter is None:
+            md_splitter = MarkdownHeaderTextSplitter(
+                headers_to_split_on=list(headers), strip_headers=strip_headers
+            )
+            MdProcessor._splitters[key] = md_splitter
         md_header_splits = md_splitter.split_text(markdown_text)
         return md_header_splits
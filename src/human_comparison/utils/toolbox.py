@@ -1,10 +1,19 @@
+import io
 import os
 import sys
 import csv
+import mmap
+import time
+import tarfile
+import tempfile
 import requests
+import zstandard
+from contextlib import contextmanager
+from pathlib import Path
 from urllib.parse import urlparse
-from typing import List
+from typing import Callable, Iterator, List, Tuple
 from loguru import logger as log
+from tqdm import tqdm
 
 
 def is_valid_web_address(url: str | None) -> bool:
@@ -31,21 +40,38 @@ def is_valid_web_address(url: str | None) -> bool:
         return False
 
 
-def contest_loader(contests_file: str) -> list:
+def contest_loader(contests_file: str, column: str | None = None) -> list:
     """
     Load contest data from a CSV file.
 
     This function reads a CSV file named 'contests.csv' and returns a list of dictionaries,
     where each dictionary represents a contest with its details.
 
+    Args:
+        contests_file (str): The path to the contests CSV file.
+        column (str | None): If set, only load this column, without building a
+            dictionary for each row.
+
     Returns:
-        list: A list of dictionaries, each containing contest details.
+        list: A list of dictionaries, each containing contest details, or the list of
+            values of the given column.
     """
     contests = []
     try:
         with open(contests_file, mode="r") as file:
-            csv_reader = csv.DictReader(file)
-            contests = list(csv_reader)
+            if column is not None:
+                csv_reader = csv.reader(file)
+                header = next(csv_reader, [])
+                if column not in header:
+                    raise ValueError(f"Error: Column {column} not found in {contests_file}")
+                index = header.index(column)
+                return [row[index] for row in csv_reader if row]
+
+            # Build the rows from the interned header instead of a DictReader, so that all
+            # the rows share the same key strings
+            csv_reader = csv.reader(file)
+            header = [sys.intern(name) for name in next(csv_reader, [])]
+            contests = [dict(zip(header, row)) for row in csv_reader if row]
             return contests
 
     except FileNotFoundError:
@@ -54,41 +80,122 @@ def contest_loader(contests_file: str) -> list:
         )
 
 
+# Default location of the downloaded reports cache
+REPORTS_CACHE_DIR = Path.home() / ".cache" / "hackbot"
+
+# Suffix of the raw reports archives (zstd compressed tarballs)
+REPORTS_ARCHIVE_SUFFIX = ".tar.zst"
+
+# Size of the chunks read from the streamed report downloads
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+
+
+def _get_cache_paths(cache_dir: str | Path, repo_url: str) -> Tuple[Path, Path]:
+    """
+    Get the paths of the cached report and of its ETag for a findings repository.
+
+    The files are stored under a directory per owner, so that repositories with the same
+    name under different owners do not share a cache entry.
+    """
+    # Owner and name of the repository, the last two segments of the URL path
+    *owner, name = urlparse(repo_url).path.strip("/").split("/")[-2:]
+    cache_path = Path(cache_dir, *owner)
+    return cache_path / f"{name}.md", cache_path / f"{name}.etag"
+
+
+def _write_cache_file(file_path: Path, content: str) -> None:
+    """
+    Atomically write a cache file, so that concurrent downloads never see a partial file.
+
+    Each write goes through its own temporary file, as the downloads of the same report
+    may run at once in several threads of the same process.
+    """
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=file_path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+            tmp_file.write(content)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def create_http_session(pool_size: int) -> requests.Session:
+    """
+    Create a session whose connection pool holds pool_size connections per host, so that
+    concurrent downloads reuse their TCP and TLS connections instead of opening new ones.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 def download_report_md(
     repo_url: str,
     github_api_key: str,
+    cache_dir: str | Path | None = None,
+    session: requests.Session | None = None,
 ) -> str:
     """
     Downloads the report.md file from a c4rena findings repository.
+
+    When cache_dir is set, the report is cached on disk along with its ETag and
+    later downloads send If-None-Match, so an unchanged report is answered with a
+    304 and loaded from the cache instead of being downloaded again.
+
+    When session is set, the request goes through its connection pool.
     """
     # Convert the repository URL to raw content URL format
     raw_url = repo_url.replace("github.com", "raw.githubusercontent.com")
     raw_url = f"{raw_url}/refs/heads/main/report.md"
-    # Make the request to download the repository
-    response = requests.get(
+    headers = {
+        "Authorization": f"token {github_api_key}",
+        "Accept": "application/vnd.github.raw+json",
+    }
+    report_path = etag_path = None
+    if cache_dir is not None:
+        report_path, etag_path = _get_cache_paths(cache_dir, repo_url)
+        if report_path.is_file() and etag_path.is_file():
+            headers["If-None-Match"] = etag_path.read_text(encoding="utf-8")
+    # Make the request to download the repository, the body is streamed in chunks and
+    # decoded as UTF-8 rather than through the charset detection of response.text
+    with (session or requests).get(
         raw_url,
-        headers={
-            "Authorization": f"token {github_api_key}",
-            "Accept": "application/vnd.github.raw+json",
-        },
-        stream=False,
+        headers=headers,
+        stream=True,
         timeout=10,
-    )
+    ) as response:
 
-    # Check if the request was successful
-    if response.status_code == 200:
+        # The cached report is still up to date
+        if response.status_code == 304 and report_path is not None:
+            log.debug(f"Report for {repo_url} not modified, loading it from {report_path}")
+            return report_path.read_text(encoding="utf-8")
 
-        # Extract the raw markdown content from the response
-        raw_content = response.text
+        # Check if the request was successful
+        if response.status_code == 200:
 
-        # Return the raw markdown content directly
-        return raw_content
+            # Extract the raw markdown content from the response
+            raw_content = b"".join(response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE)).decode(
+                "utf-8"
+            )
 
-    else:
-        # Raise an exception if the request was not successful
-        raise requests.exceptions.HTTPError(
-            f"Failed to download report.md from {repo_url}\n (raw url: {raw_url})\n with status code: {response.status_code}.\n Check that the repository exists and that your github_api_key is correct."
-        )
+            # Cache the report first so that the ETag never points to a stale report
+            etag = response.headers.get("ETag")
+            if report_path is not None and etag:
+                _write_cache_file(report_path, raw_content)
+                _write_cache_file(etag_path, etag)
+
+            # Return the raw markdown content directly
+            return raw_content
+
+        else:
+            # Raise an exception if the request was not successful
+            raise requests.exceptions.HTTPError(
+                f"Failed to download report.md from {repo_url}\n (raw url: {raw_url})\n with status code: {response.status_code}.\n Check that the repository exists and that your github_api_key is correct."
+            )
 
 
 def get_repo_name(input: str) -> str:
@@ -122,18 +229,94 @@ def get_md_files(path: str) -> List[str]:
     return md_files_to_process
 
 
+def read_report_md(file_path: str) -> str:
+    """
+    Read a report (md file) through a memory map.
+
+    The file is decoded straight from the mapped pages, without first copying its
+    content into an intermediate bytes buffer. Newlines are normalized to "\n", as
+    when reading the file in text mode.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            raw_report = str(mm, "utf-8")
+    return _normalize_newlines(raw_report)
+
+
+def _normalize_newlines(text: str) -> str:
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def is_reports_archive(path: str | Path) -> bool:
+    return str(path).endswith(REPORTS_ARCHIVE_SUFFIX)
+
+
+@contextmanager
+def write_reports_archive(path: str | Path) -> Iterator[Callable[[str, str], None]]:
+    """
+    Open a raw reports archive for writing and yield a function adding one report to it.
+
+    All the reports are streamed into a single zstd compressed tarball, which is much
+    smaller than the md files and is written (and read back) with sequential I/O.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with (
+        open(path, "wb") as f,
+        zstandard.ZstdCompressor().stream_writer(f) as compressed,
+        tarfile.open(fileobj=compressed, mode="w|") as tar,
+    ):
+
+        def add_report(file_name: str, raw_report: str) -> None:
+            data = raw_report.encode("utf-8")
+            info = tarfile.TarInfo(file_name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(data))
+
+        yield add_report
+
+
+def read_reports_archive(path: str | Path) -> Iterator[Tuple[str, str]]:
+    """
+    Iterate over the (file name, raw report) pairs of a raw reports archive.
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Error: {path} does not exist, exiting")
+    with (
+        open(path, "rb") as f,
+        zstandard.ZstdDecompressor().stream_reader(f) as decompressed,
+        tarfile.open(fileobj=decompressed, mode="r|") as tar,
+    ):
+        for member in tar:
+            if member.isfile() and member.name.endswith(".md"):
+                raw_report = tar.extractfile(member).read().decode("utf-8")
+                yield member.name, _normalize_newlines(raw_report)
+
+
+def _log_format(record: dict) -> str:
+    # The repo name is bound per contest with log.contextualize(repo_name=...), so that
+    # contests processed concurrently keep their own prefix
+    if record["extra"].get("repo_name"):
+        return (
+            "<level>{level: <8}</level> | <cyan>{extra[repo_name]}</cyan> | "
+            "<level>{message}</level>\n{exception}"
+        )
+    return "<level>{level: <8}</level> | <cyan>{message}</cyan>\n{exception}"
+
+
 def set_logger(repo_name: str = None, debug: bool = False):
     log.remove()  # Remove any existing handlers
-    format = None
-    if repo_name:
-        format = (
-            f"<level>{{level: <8}}</level> | <cyan>{repo_name}</cyan> | <level>{{message}}</level>"
-        )
-    else:
-        format = "<level>{level: <8}</level> | <cyan>{message}</cyan>"
+    # Default repo name of the records logged outside of a contest context
+    log.configure(extra={"repo_name": repo_name})
 
+    # Write through tqdm so that log lines do not break the progress bars
     log.add(
-        sys.stdout,
-        format=format,
+        lambda message: tqdm.write(message, end=""),
+        format=_log_format,
         level="INFO" if not debug else "DEBUG",
+        colorize=sys.stdout.isatty(),
     )